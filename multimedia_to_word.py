@@ -14,19 +14,37 @@ Output: Word document in multimedia_finished_transcripts/ with MULTIMEDIA_ prefi
 """
 
 import os
+import re
+import tempfile
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+from itertools import chain
 from pathlib import Path
+from typing import BinaryIO
 
-from pdf2image import convert_from_path
-
-from PIL import Image
-from docx import Document
-from docx.shared import Inches
+# pdf2image and python-docx are imported inside the functions that use them,
+# so importing this module (e.g. for the parsers) stays cheap
 
 INPUT_DIR = "multimedia_materials"
 OUTPUT_DIR = "multimedia_finished_transcripts"
 OUTPUT_PREFIX = "MULTIMEDIA_"
 
+# Slides are shown 6 inches wide; 1200 px keeps them sharp (200 DPI) without
+# embedding pixels Word never displays
+SLIDE_WIDTH_INCHES = 6
+SLIDE_WIDTH_PX = 1200
+
+# States for the line-by-line VTT parser
+_EXPECT_INDEX, _EXPECT_TIMESTAMP, _EXPECT_TEXT, _SKIP_CUE = range(4)
+
+# Voice (speaker) tags such as "<v ->", "<v Speaker>" and "</v>"
+_VTAG_RE = re.compile(r'<v[^>\n]*>|</v>')
+
+# Slide timestamps in HH:MM:SS or MM:SS format (hours optional)
+_TIMESTAMP_RE = re.compile(r'(?:(\d+):)?(\d{1,2}):(\d{1,2})')
+
 
 def discover_input_files(input_dir: str) -> tuple[str, str, str]:
     """
@@ -44,12 +62,17 @@ def discover_input_files(input_dir: str) -> tuple[str, str, str]:
     if not os.path.exists(input_dir):
         raise ValueError(f"Error: Input directory '{input_dir}/' does not exist")
 
-    files = os.listdir(input_dir)
+    # Find files by extension in a single pass
+    files_by_ext = {'.pdf': [], '.vtt': [], '.txt': []}
+    with os.scandir(input_dir) as entries:
+        for entry in entries:
+            ext = os.path.splitext(entry.name)[1].lower()
+            if ext in files_by_ext and entry.is_file():
+                files_by_ext[ext].append(entry.name)
 
-    # Find files by extension
-    pdf_files = [f for f in files if f.lower().endswith('.pdf')]
-    vtt_files = [f for f in files if f.lower().endswith('.vtt')]
-    txt_files = [f for f in files if f.lower().endswith('.txt')]
+    pdf_files = files_by_ext['.pdf']
+    vtt_files = files_by_ext['.vtt']
+    txt_files = files_by_ext['.txt']
 
     # Validate counts
     if len(pdf_files) == 0:
@@ -80,21 +103,38 @@ def discover_input_files(input_dir: str) -> tuple[str, str, str]:
     )
 
 
-def extract_pdf_slides(pdf_path: str) -> list[Image.Image]:
+def extract_pdf_slides(pdf_path: str, output_folder: str) -> list[str]:
     """
-    Extract slides from PDF as images.
+    Extract slides from PDF as PNG files.
+
+    Pages are written straight to disk by poppler rather than decoded into
+    memory, so the caller owns output_folder and must keep it alive until
+    the images have been used.
 
     Args:
         pdf_path: Path to PDF file
+        output_folder: Directory to write the slide images to
 
     Returns:
-        List of PIL Images, one per slide
+        List of PNG file paths, one per slide (in page order)
 
     Raises:
         ValueError: If PDF is empty or invalid
     """
+    from pdf2image import convert_from_path
+
     try:
-        slides = convert_from_path(pdf_path, dpi=150, fmt='PNG')
+        # Split the pages across one poppler worker per CPU core, rendering
+        # straight to the display width (height follows the aspect ratio)
+        slides = convert_from_path(
+            pdf_path,
+            size=(SLIDE_WIDTH_PX, None),
+            fmt='PNG',
+            thread_count=os.cpu_count() or 4,
+            use_pdftocairo=True,
+            output_folder=output_folder,
+            paths_only=True
+        )
     except Exception as e:
         if "poppler" in str(e).lower():
             raise ImportError(
@@ -130,61 +170,95 @@ def vtt_timestamp_to_seconds(timestamp: str) -> float:
     return h * 3600 + m * 60 + s + ms / 1000.0
 
 
-def parse_vtt_with_timestamps(vtt_path: str) -> list[dict]:
+def iter_vtt_entries(vtt_path: str) -> Iterator[dict]:
     """
-    Parse VTT file and preserve timestamps.
+    Stream VTT cues one at a time.
 
-    VTT structure:
-    - First 2 lines: WEBVTT header
-    - Chunks separated by blank lines (\n\n)
-    - Each chunk: entry number, timestamp range, text (with possible <v -> tags)
+    Reads the file line by line with a small state machine, so only the
+    current cue is held in memory:
+    - First 2 lines: WEBVTT header (skipped)
+    - Cues separated by blank lines
+    - Each cue: entry number, timestamp range, text (with possible <v> tags)
 
     Args:
         vtt_path: Path to VTT file
 
-    Returns:
-        List of dicts: [{"start": 3.39, "end": 7.17, "text": "..."}]
+    Yields:
+        Dicts of the form {"start": 3.39, "end": 7.17, "text": "..."}
     """
-    with open(vtt_path, 'r', encoding='utf-8') as f:
-        # Skip first 2 lines (WEBVTT header)
-        next(f)
-        next(f)
+    # Read bytes: timestamps are ASCII, so only cue text needs a UTF-8 decode
+    with open(vtt_path, 'rb') as f:
+        # Skip first 2 lines (WEBVTT header); a shorter file has no cues
+        if next(f, None) is None or next(f, None) is None:
+            return
 
-        # Read remaining content
-        file_content = f.read()
+        state = _EXPECT_INDEX
+        start_bytes = end_bytes = b''
+        text_lines = []
 
-    # Split on blank lines
-    chunks = file_content.split('\n\n')
+        # A trailing blank line flushes the last cue
+        for line in chain(f, (b'',)):
+            line = line.rstrip(b'\r\n')
 
-    entries = []
-    for chunk in chunks:
-        if not chunk.strip():
-            continue
+            # Blank line: finish the current cue
+            if not line:
+                if text_lines:
+                    # Line 2+: text (remove <v> tags, if the cue has any markup)
+                    raw_text = b' '.join(text_lines)
+                    text = raw_text.decode('utf-8')
+                    if b'<' in raw_text:
+                        text = _VTAG_RE.sub('', text)
+                    text = text.strip()
+
+                    yield {
+                        'start': vtt_timestamp_to_seconds(start_bytes.decode('ascii')),
+                        'end': vtt_timestamp_to_seconds(end_bytes.decode('ascii')),
+                        'text': text
+                    }
+
+                state = _EXPECT_INDEX
+                text_lines = []
+            elif state == _EXPECT_INDEX:
+                state = _EXPECT_TIMESTAMP
+            elif state == _EXPECT_TIMESTAMP:
+                # Line 1: timestamp range (HH:MM:SS.mmm --> HH:MM:SS.mmm)
+                start_bytes, arrow, end_bytes = line.partition(b'-->')
+                # Skip the whole cue if there is no timestamp
+                state = _EXPECT_TEXT if arrow else _SKIP_CUE
+            elif state == _EXPECT_TEXT:
+                text_lines.append(line)
+
+
+def parse_vtt_with_timestamps(vtt_path: str) -> tuple[list[dict], float]:
+    """
+    Parse VTT file and preserve timestamps.
 
-        lines = chunk.split('\n')
-        if len(lines) < 3:
-            continue  # Skip malformed chunks
+    See iter_vtt_entries() for the streaming parser this collects from.
+    The video duration (latest cue end time) is tracked along the way.
+
+    Args:
+        vtt_path: Path to VTT file
 
-        # Line 1: timestamp range (HH:MM:SS.mmm --> HH:MM:SS.mmm)
-        timestamp_line = lines[1]
-        if '-->' not in timestamp_line:
-            continue  # Skip if no timestamp
+    Returns:
+        Tuple of (entries, max_end):
+        - entries: List of dicts: [{"start": 3.39, "end": 7.17, "text": "..."}]
+        - max_end: Latest cue end time in seconds
 
-        start_str, end_str = timestamp_line.split('-->')
-        start_time = vtt_timestamp_to_seconds(start_str.strip())
-        end_time = vtt_timestamp_to_seconds(end_str.strip())
+    Raises:
+        ValueError: If the file contains no valid entries
+    """
+    entries = []
+    max_end = 0.0
 
-        # Line 2+: text (remove <v -> tags)
-        text = ' '.join(lines[2:])
-        text = text.replace('<v ->', '').strip()
+    for entry in iter_vtt_entries(vtt_path):
+        entries.append(entry)
+        if entry['end'] > max_end:
+            max_end = entry['end']
 
-        entries.append({
-            'start': start_time,
-            'end': end_time,
-            'text': text
-        })
+    if not entries:
+        raise ValueError("Error: VTT file contains no valid entries")
 
-    return entries
+    return entries, max_end
 
 
 def mmss_to_seconds(timestamp: str) -> float:
@@ -269,6 +343,15 @@ def parse_timestamp_file(txt_path: str) -> list[float]:
             if not line:
                 continue  # Skip empty lines
 
+            # Fast path: well-formed [H:]MM:SS matched in one regex call
+            m = _TIMESTAMP_RE.fullmatch(line)
+            if m:
+                hours, minutes, seconds = map(int, m.groups(default='0'))
+                if minutes < 60 and seconds < 60:
+                    timestamps.append(hours * 3600 + minutes * 60 + seconds)
+                    continue
+
+            # Anything else goes through the full parser for its error messages
             try:
                 timestamp = mmss_to_seconds(line)
             except ValueError as e:
@@ -300,10 +383,10 @@ def parse_timestamp_file(txt_path: str) -> list[float]:
 def validate_alignment(
     slide_count: int,
     timestamps: list[float],
-    vtt_entries: list[dict]
+    max_video_time: float
 ) -> None:
     """
-    Validate alignment between slides, timestamps, and VTT entries.
+    Validate alignment between slides, timestamps, and the video duration.
 
     Validates:
     - Slide count matches timestamp count
@@ -314,7 +397,7 @@ def validate_alignment(
     Args:
         slide_count: Number of slides in PDF
         timestamps: List of slide timestamps
-        vtt_entries: List of VTT entries with start/end times
+        max_video_time: Latest VTT cue end time in seconds
 
     Raises:
         ValueError: If validation fails
@@ -326,23 +409,21 @@ def validate_alignment(
             f"timestamp count ({len(timestamps)})"
         )
 
-    # Get max video duration
-    if not vtt_entries:
-        raise ValueError("Error: VTT file contains no valid entries")
-
-    max_video_time = max(entry['end'] for entry in vtt_entries)
-
-    # Validate all timestamps within video duration
-    for i, ts in enumerate(timestamps):
-        if ts > max_video_time:
-            minutes = int(ts // 60)
-            seconds = int(ts % 60)
-            max_minutes = int(max_video_time // 60)
-            max_seconds = int(max_video_time % 60)
-            raise ValueError(
-                f"Error: Timestamp {i + 1} ({minutes:02d}:{seconds:02d}) exceeds "
-                f"video duration ({max_minutes:02d}:{max_seconds:02d})"
-            )
+    # Timestamps are ascending, so checking the last one covers them all
+    if not timestamps or timestamps[-1] <= max_video_time:
+        return
+
+    # Report the first timestamp past the end of the video
+    i = bisect_right(timestamps, max_video_time)
+    ts = timestamps[i]
+    minutes = int(ts // 60)
+    seconds = int(ts % 60)
+    max_minutes = int(max_video_time // 60)
+    max_seconds = int(max_video_time % 60)
+    raise ValueError(
+        f"Error: Timestamp {i + 1} ({minutes:02d}:{seconds:02d}) exceeds "
+        f"video duration ({max_minutes:02d}:{max_seconds:02d})"
+    )
 
 
 def reconstruct_sentences(text_chunks: list[str]) -> str:
@@ -359,75 +440,64 @@ def reconstruct_sentences(text_chunks: list[str]) -> str:
         String with properly reconstructed sentences
     """
     sentences = []
-    current_sentence = ""
-    sentence_punctuations = ['.', '!', '?']
+    current_parts = []
 
     for text in text_chunks:
         # Skip empty text
         if not text:
             continue
 
-        # If ending punctuation is found, add to current sentence and finalize
-        if text[-1] in sentence_punctuations:
-            current_sentence += text + " "
-            sentences.append(current_sentence)
-            current_sentence = ""
-        else:
-            # Add the text with a space for the next text
-            current_sentence += text + " "
+        current_parts.append(text)
+
+        # If ending punctuation is found, finalize the current sentence
+        if text.endswith(('.', '!', '?')):
+            sentences.append(' '.join(current_parts))
+            current_parts.clear()
 
     # Add any remaining text
-    if current_sentence:
-        sentences.append(current_sentence)
+    if current_parts:
+        sentences.append(' '.join(current_parts))
 
-    return ''.join(sentences).strip()
+    return ' '.join(sentences).strip()
 
 
 def segment_transcript(
-    vtt_entries: list[dict],
+    vtt_entries: Iterable[dict],
     timestamps: list[float]
 ) -> list[str]:
     """
     Segment transcript by slide timestamps.
 
-    For each slide timestamp, collect VTT entries in range:
+    Assign each VTT entry to a slide in a single pass:
     - Slide i: timestamps[i] <= entry['start'] < timestamps[i+1]
     - Last slide: timestamps[-1] <= entry['start'] < infinity
 
     Args:
-        vtt_entries: List of VTT entries with start/end times and text
-        timestamps: List of slide timestamps in seconds
+        vtt_entries: VTT entries with start/end times and text (any iterable)
+        timestamps: List of slide timestamps in seconds (ascending)
 
     Returns:
         List of transcript segments (one per slide)
     """
-    segments = []
-
-    for i in range(len(timestamps)):
-        # Determine time range for this slide
-        start_time = timestamps[i]
-        end_time = timestamps[i + 1] if i + 1 < len(timestamps) else float('inf')
-
-        # Collect VTT entries in this range
-        text_chunks = []
-        for entry in vtt_entries:
-            if start_time <= entry['start'] < end_time:
-                text_chunks.append(entry['text'])
-
-        # Reconstruct sentences
-        if text_chunks:
-            segment_text = reconstruct_sentences(text_chunks)
-            segments.append(segment_text)
-        else:
-            segments.append("")  # Empty segment
+    buckets = [[] for _ in timestamps]
 
-    return segments
+    for entry in vtt_entries:
+        # Index of the last slide starting at or before this entry
+        slide_idx = bisect_right(timestamps, entry['start']) - 1
+        if slide_idx >= 0:
+            buckets[slide_idx].append(entry['text'])
+
+    # Reconstruct sentences (empty segment if a slide has no entries)
+    return [
+        reconstruct_sentences(text_chunks) if text_chunks else ""
+        for text_chunks in buckets
+    ]
 
 
 def create_word_document(
-    slides: list[Image.Image],
+    slides: list[str],
     transcript_segments: list[str],
-    output_path: str
+    output_path: str | BinaryIO
 ) -> None:
     """
     Create Word document with alternating slide images and transcript segments.
@@ -439,20 +509,18 @@ def create_word_document(
     - Page break (except after last slide)
 
     Args:
-        slides: List of PIL Images (slide images)
+        slides: List of slide image file paths
         transcript_segments: List of transcript text (one per slide)
-        output_path: Path to save Word document
+        output_path: Path or writable binary stream to save Word document to
     """
-    doc = Document()
+    from docx import Document
+    from docx.shared import Inches
 
-    for i, (slide_image, transcript_text) in enumerate(zip(slides, transcript_segments)):
-        # Add slide image
-        # Convert PIL Image to BytesIO stream
-        img_stream = BytesIO()
-        slide_image.save(img_stream, format='PNG')
-        img_stream.seek(0)
+    doc = Document()
 
-        doc.add_picture(img_stream, width=Inches(6))
+    for i, (slide_path, transcript_text) in enumerate(zip(slides, transcript_segments)):
+        # Add slide image (already a PNG, so embed the file as-is)
+        doc.add_picture(slide_path, width=Inches(SLIDE_WIDTH_INCHES))
 
         # Add spacing
         doc.add_paragraph()
@@ -473,6 +541,30 @@ def create_word_document(
     doc.save(output_path)
 
 
+def create_word_document_stream(
+    slides: list[str],
+    transcript_segments: list[str]
+) -> BytesIO:
+    """
+    Create the Word document in memory instead of on disk.
+
+    Useful when the document is handed straight to a download rather than
+    kept, e.g. st.download_button(data=buf.getvalue(), ...).
+
+    Args:
+        slides: List of slide image file paths
+        transcript_segments: List of transcript text (one per slide)
+
+    Returns:
+        BytesIO positioned at the start of the .docx data
+    """
+    buf = BytesIO()
+    create_word_document(slides, transcript_segments, buf)
+    buf.seek(0)
+
+    return buf
+
+
 def main():
     """Main execution function."""
     try:
@@ -488,43 +580,52 @@ def main():
         print(f"  Found VTT: {vtt_name}")
         print(f"  Found TXT: {txt_name}")
 
-        # 2. Extract data
-        print("\nExtracting PDF slides...")
-        slides = extract_pdf_slides(pdf_path)
-        print(f"  Extracted {len(slides)} slide(s)")
+        # Slide images live in a temporary directory until the document is saved
+        with tempfile.TemporaryDirectory() as slide_dir:
+            # 2. Extract data
+            # The three inputs are independent, so parse the VTT and timestamp
+            # files while poppler rasterizes the PDF (it runs outside the GIL)
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                slides_future = executor.submit(extract_pdf_slides, pdf_path, slide_dir)
+                vtt_future = executor.submit(parse_vtt_with_timestamps, vtt_path)
+                timestamps_future = executor.submit(parse_timestamp_file, txt_path)
+
+                print("\nExtracting PDF slides...")
+                slides = slides_future.result()
+                print(f"  Extracted {len(slides)} slide(s)")
 
-        print("\nParsing VTT transcript...")
-        vtt_entries = parse_vtt_with_timestamps(vtt_path)
-        print(f"  Parsed {len(vtt_entries)} transcript entry/entries")
+                print("\nParsing VTT transcript...")
+                vtt_entries, max_video_time = vtt_future.result()
+                print(f"  Parsed {len(vtt_entries)} transcript entry/entries")
 
-        print("\nParsing timestamp file...")
-        timestamps = parse_timestamp_file(txt_path)
-        print(f"  Parsed {len(timestamps)} timestamp(s)")
+                print("\nParsing timestamp file...")
+                timestamps = timestamps_future.result()
+                print(f"  Parsed {len(timestamps)} timestamp(s)")
 
-        # 3. Validate alignment
-        print("\nValidating alignment...")
-        validate_alignment(len(slides), timestamps, vtt_entries)
-        print("  Alignment validated successfully")
+            # 3. Validate alignment
+            print("\nValidating alignment...")
+            validate_alignment(len(slides), timestamps, max_video_time)
+            print("  Alignment validated successfully")
 
-        # 4. Segment transcript by timestamps
-        print("\nSegmenting transcript by slide timestamps...")
-        transcript_segments = segment_transcript(vtt_entries, timestamps)
-        print(f"  Created {len(transcript_segments)} transcript segment(s)")
+            # 4. Segment transcript by timestamps
+            print("\nSegmenting transcript by slide timestamps...")
+            transcript_segments = segment_transcript(vtt_entries, timestamps)
+            print(f"  Created {len(transcript_segments)} transcript segment(s)")
 
-        # 5. Create Word document
-        print("\nCreating Word document...")
+            # 5. Create Word document
+            print("\nCreating Word document...")
 
-        # Ensure output directory exists
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
+            # Ensure output directory exists
+            os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-        # Generate output filename
-        pdf_basename = Path(pdf_path).stem
-        output_filename = f"{OUTPUT_PREFIX}{pdf_basename}.docx"
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
+            # Generate output filename
+            pdf_basename = Path(pdf_path).stem
+            output_filename = f"{OUTPUT_PREFIX}{pdf_basename}.docx"
+            output_path = os.path.join(OUTPUT_DIR, output_filename)
 
-        create_word_document(slides, transcript_segments, output_path)
+            create_word_document(slides, transcript_segments, output_path)
 
-        print(f"\nSuccessfully created: {output_path}")
+            print(f"\nSuccessfully created: {output_path}")
 
     except (ValueError, ImportError) as e:
         print(f"\n{e}")
@@ -1,51 +1,127 @@
-# Look for files in the "transcripts_to_translate" directory
+"""
+VTT to Text-Only Transcript Converter
+
+Converts WebVTT video transcripts into plain text, with caption fragments
+joined back into sentences.
+
+Run as a script, converts every .vtt file in transcripts_to_translate/ and
+writes the result to text_only_finished_transcripts/ with a TEXTONLY_ prefix.
+Import vtt_to_plain_text() to convert a single file in memory.
+"""
+
 import os
+import re
+from collections.abc import Iterator
+from itertools import chain
+from typing import BinaryIO
+
+# Voice (speaker) tags such as "<v ->", "<v Speaker>" and "</v>"
+_VTAG_RE = re.compile(r'<v[^>\n]*>|</v>')
+
+# Punctuation that ends a sentence (a tuple, so str.endswith can check all at once)
+_SENTENCE_PUNCTUATIONS = ('.', '!', '?')
+
+
+def _iter_transcript_text(buf: BinaryIO) -> Iterator[str]:
+    """
+    Stream the transcript text of each VTT chunk, one line at a time.
+
+    Args:
+        buf: Binary file-like object positioned after the 2-line VTT header
+
+    Yields:
+        The text line of each chunk, with <v> tags removed
+
+    Raises:
+        UnicodeDecodeError: If a text line is not valid UTF-8
+    """
+    # Chunks are separated by blank lines, and only the last line of each
+    # chunk is transcript text, so remember it until the chunk ends. Lines
+    # stay as bytes; only the kept line is decoded. A trailing blank line
+    # flushes the last chunk.
+    last_line = b""
+    for line in chain(buf, (b'',)):
+        line = line.rstrip(b'\r\n')
+        if line:
+            last_line = line
+        elif last_line:
+            # Remove the <v> tags: Canvas only emits a leading "<v ->", so
+            # strip that prefix and fall back to the regex for other tags
+            text = last_line.removeprefix(b'<v ->').decode('utf-8')
+            if '<' in text:
+                text = _VTAG_RE.sub('', text)
+            yield text
+            last_line = b""
+
+
+def vtt_to_plain_text(buf: BinaryIO, name: str) -> tuple[str, str] | None:
+    """
+    Convert a VTT transcript into plain text sentences, in memory.
+
+    Args:
+        buf: Binary file-like object holding the VTT file
+        name: Original file name, used to build the output name
+
+    Returns:
+        Tuple of (converted text, output file name), or None if the file is
+        too short to be a VTT transcript or a transcript text line is not
+        valid UTF-8 (other lines are never decoded)
+    """
+    # Skip the first 2 lines
+    if not buf.readline() or not buf.readline():
+        return None
+
+    # String sentences together using punctuation marks: every text is
+    # followed by a space, and the whole transcript is joined once at the end
+    pieces = []
+    sentences_end = 0
+
+    try:
+        for text in _iter_transcript_text(buf):
+            # Skip empty text
+            if not text:
+                continue
+
+            # Add the text with a space after for the next text
+            pieces.append(text)
+            pieces.append(" ")
+
+            # If ending punctuation is found, the transcript so far is complete sentences
+            if text.endswith(_SENTENCE_PUNCTUATIONS):
+                sentences_end = len(pieces)
+    except UnicodeDecodeError:
+        return None
+
+    # Drop the trailing unfinished sentence
+    del pieces[sentences_end:]
+
+    # Create output file name, dropping only the last extension
+    # ("lecture.part1.vtt" -> "TEXTONLY_lecture.part1.txt")
+    stem, _, _ = name.rpartition('.')
+    new_file_name = "TEXTONLY_" + (stem or name) + ".txt"
+
+    return ''.join(pieces), new_file_name
+
+
+def main():
+    """Convert every .vtt file in transcripts_to_translate/."""
+    # Look for files in the "transcripts_to_translate" directory
+    for file_name in os.listdir("transcripts_to_translate"):
+        if file_name.endswith('.vtt'):
+            # Open the file
+            with open(os.path.join("transcripts_to_translate", file_name), 'rb') as input_file:
+                result = vtt_to_plain_text(input_file, file_name)
+
+            if result is None:
+                print(f"Skipping {file_name}: not a readable VTT transcript")
+                continue
+            content, new_file_name = result
+
+            # Place in finsihed_transcripts directory, always encoded as UTF-8
+            output_path = os.path.join("text_only_finished_transcripts", new_file_name)
+            with open(output_path, 'wb') as output_file:
+                output_file.write(content.encode('utf-8'))
 
 
-for file_name in os.listdir("transcripts_to_translate"):
-    if file_name.endswith('.vtt'):
-        # Open the file
-        with open(os.path.join("transcripts_to_translate", file_name), 'r') as input_file:
-            # Skip the first 2 lines
-            next(input_file)
-            next(input_file)
-
-            # Read the file
-            file_content = input_file.read()
-
-            # Split on blank lines (so \n\n)
-            chunks = file_content.split('\n\n')
-            
-
-            # Only interested in the text, so for each chunk, first split on the newline
-            # then take the last element, which is the transcript text
-            transcript_text = [chunk.split('\n')[-1] for chunk in chunks]
-            
-            # Remove the "<v -> tag" from the transcript text
-            transcript_text = [text.replace('<v ->', '') for text in transcript_text]
-            
-            # String sentences together using punctuation marks
-            sentences = []
-            current_sentence = ""
-            sentence_punctuations = ['.', '!', '?']
-
-            for text in transcript_text:
-                # Skip empty text
-                if not text:
-                    continue
-
-                # If ending punctuation is found, add the text to the end of the current sentence and add to the sentences list
-                if text[-1] in sentence_punctuations:
-                    current_sentence += text + " "
-                    sentences.append(current_sentence)
-                    current_sentence = ""
-                else:
-                    # Add the text with a space after for the next text
-                    current_sentence += text + " "
-
-            # Create output file with sentences
-            new_file_name = "TEXTONLY_" + file_name.split('.')[0] + ".txt"
-
-            # Place in finsihed_transcripts directory
-            with open(os.path.join("text_only_finished_transcripts", new_file_name), 'w') as output_file:
-                output_file.writelines(sentences)
\ No newline at end of file
+if __name__ == "__main__":
+    main()